@@ -1,10 +1,36 @@
 import os
+import asyncio
+import hashlib
+import logging
 import datetime
-from typing import Union, List
+from typing import Union, List, Tuple, Any, Dict, Optional
 
 import httpx
 
 from lib.airnow import AirNow, Forecast, Observation
+from lib.cache import FileCache, RedisCache
+from lib.discord import DiscordWebhookSender
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Created at import time so warm Lambda invocations reuse open connections
+CLIENT = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+    http2=True,
+    timeout=30.0
+)
+# The async client's connections belong to the loop that opened them, so
+# one loop is kept alongside it instead of a fresh one per asyncio.run
+LOOP = asyncio.new_event_loop()
+ASYNC_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=10),
+    http2=True,
+    timeout=30.0
+)
+DIVIDER = "-" * 37
+# Kept per webhook so rate limit state survives warm invocations
+SENDERS: Dict[str, DiscordWebhookSender] = {}
 
 
 def aqi_report(event = None, context = None):
@@ -27,10 +53,14 @@ def aqi_report(event = None, context = None):
     AQI_BOT_MORNING_RANGE_UTC = os.environ["AQI_BOT_MORNING_RANGE_UTC"]
 
     morning_range = [int(x) for x in AQI_BOT_MORNING_RANGE_UTC.split(",")]
-    airnow = AirNow(AQI_BOT_AIRNOW_API_TOKEN, httpx.Client())
-
-    current = airnow.get_current(AQI_BOT_AIRNOW_ZIP_CODE)
-    forecast = airnow.get_forecast(AQI_BOT_AIRNOW_ZIP_CODE)
+    cache = get_cache()
+    current, forecast = LOOP.run_until_complete(
+        _fetch_aqi_data(
+            AQI_BOT_AIRNOW_API_TOKEN,
+            AQI_BOT_AIRNOW_ZIP_CODE,
+            cache
+        )
+    )
 
     message = render_message(
         current,
@@ -38,11 +68,79 @@ def aqi_report(event = None, context = None):
         morning_range
     )
 
-    response = httpx.post(
-        AQI_BOT_DISCORD_BOT_URL,
-        json={ "content": message }
+    # Skip the post when nothing changed since the last run to this webhook
+    digest = hashlib.blake2b(message.encode(), digest_size=16).digest()
+    digest_key = get_digest_key(AQI_BOT_DISCORD_BOT_URL)
+    if read_digest(cache, digest_key) == digest:
+        logger.info("AQI report unchanged since the last run, skipping")
+        return
+
+    get_sender(AQI_BOT_DISCORD_BOT_URL).send({ "content": message })
+    write_digest(cache, digest_key, digest)
+
+
+def get_digest_key(url: str) -> str:
+    """Returns the cache key for a webhook's last message digest"""
+    # Hashed so the webhook URL, which contains its token, isn't stored
+    url_hash = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+    return f"last-message:{url_hash}"
+
+
+def read_digest(cache: Any, key: str) -> Optional[bytes]:
+    """Returns the last message digest, or None if it can't be read"""
+    try:
+        return cache.get_raw(key)
+    except Exception:
+        logger.exception("Could not read the last message digest")
+        return None
+
+
+def write_digest(cache: Any, key: str, digest: bytes):
+    """Saves the message digest, logging rather than raising on failure"""
+    # The post already went out, so failing here would only make a retried
+    # invocation send a duplicate message
+    try:
+        cache.set_raw(key, digest)
+    except Exception:
+        logger.exception("Could not save the last message digest")
+
+
+def get_sender(url: str) -> DiscordWebhookSender:
+    """Returns the shared rate limited sender for a Discord webhook"""
+    if url not in SENDERS:
+        SENDERS[url] = DiscordWebhookSender(url, CLIENT)
+    return SENDERS[url]
+
+
+def get_cache() -> Any:
+    """Returns a Redis cache if AQI_BOT_REDIS_URL is set, else a file cache"""
+    if "AQI_BOT_REDIS_URL" in os.environ:
+        import redis
+        return RedisCache(redis.Redis.from_url(os.environ["AQI_BOT_REDIS_URL"]))
+    return FileCache()
+
+
+async def _fetch_aqi_data(
+    token: str,
+    zip_code: str,
+    cache: Any = None
+) -> Tuple[Observation, List[Forecast]]:
+    """
+    Fetches current and forecast AQI data concurrently. Must be run on
+    LOOP, as ASYNC_CLIENT's connection pool is bound to that event loop.
+    """
+    airnow = AirNow(
+        token,
+        CLIENT,
+        ASYNC_CLIENT,
+        cache,
+        fallback_errors=(httpx.TransportError,)
+    )
+    current, forecast = await asyncio.gather(
+        airnow.aget_current(zip_code),
+        airnow.aget_forecast(zip_code)
     )
-    response.raise_for_status()
+    return current, forecast
 
 
 def render_message(
@@ -51,19 +149,24 @@ def render_message(
     morning_range: List[int]
 ) -> str:
     """Renders a formatted message of current AQI data"""
-    return f"""
-{get_title_block(current.date_observed.strftime('%A'), is_evening(morning_range))}
-```markdown
-Current AQI
--------------------------------------
-Recorded: {current.datetime_observed}
-Location: {current.reporting_area}
+    day = current.date_observed.strftime('%A')
+    parts = [
+        "",
+        get_title_block(day, is_evening(morning_range)),
+        "```markdown",
+        "Current AQI",
+        DIVIDER,
+        f"Recorded: {current.datetime_observed}",
+        f"Location: {current.reporting_area}",
+        "",
+        get_aqi_rows(current),
+        "",
+        "".join(get_forecast_block(f) for f in forecasts),
+        "```",
+        "    ",
+    ]
+    return "\n".join(parts)
 
-{get_aqi_rows(current)}
-
-{"".join([get_forecast_block(f) for f in forecasts])}
-```
-    """
 
 def is_evening(morning_range: List[int]) -> bool:
     """Returns True if current time is not between 15:00 and 19:00 UTC"""
@@ -99,34 +202,38 @@ def get_title_block(day: str, is_evening: bool) -> str:
 
 def get_forecast_block(forecast: Forecast) -> str:
     """Renders a forecast block"""
-    return f"""
-Forecast AQI
--------------------------------------
-Forecast For: {forecast.date_forecast}
-Location: {forecast.reporting_area}
-
-{get_aqi_rows(forecast)}
-
-    """
+    parts = [
+        "",
+        "Forecast AQI",
+        DIVIDER,
+        f"Forecast For: {forecast.date_forecast}",
+        f"Location: {forecast.reporting_area}",
+        "",
+        get_aqi_rows(forecast),
+        "",
+        "    ",
+    ]
+    return "\n".join(parts)
 
 
 def get_aqi_rows(aqi_data: Union[Observation,Forecast]) -> str:
     """Generate AQI table rows"""
-    rows = ""
+    parts = []
     for metric in aqi_data:
         if metric:
-            row = f'{metric.name.rjust(8)}  |'
-            row += f'  {str(metric.AQI).ljust(8)}\n'
-            rows += row
-
-    return rows.rstrip("\n")
+            parts.append(
+                f'{metric.name.rjust(8)}  |  {str(metric.AQI).ljust(8)}'
+            )
+    return "\n".join(parts)
 
 
 if __name__ == "__main__":
     import json
+    logging.basicConfig()
     with open("./env.json") as config:
         config_data = json.loads(config.read())
     for key, value in config_data.items():
         os.environ[key] = value
     aqi_report()
+    LOOP.run_until_complete(ASYNC_CLIENT.aclose())
 
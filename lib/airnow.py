@@ -1,10 +1,25 @@
 import enum
+import asyncio
+import logging
 import datetime
-from typing import Optional, Any, List, Dict, Iterable
-from dataclasses import dataclass
+import operator
+from collections import defaultdict
+from typing import Optional, Any, List, Dict, Iterable, Tuple, Type
+from dataclasses import dataclass, field
 
-FORECAST_BASE_URL = "https://www.airnowapi.org/aq/forecast/zipCode/?format=application/json&"
-OBSERVATION_BASE_URL = "https://www.airnowapi.org/aq/observation/zipCode/current/?format=application/json&"
+from lib.cache import CacheEntry
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+logger = logging.getLogger(__name__)
+
+FORECAST_BASE_URL = "https://www.airnowapi.org/aq/forecast/zipCode/"
+OBSERVATION_BASE_URL = "https://www.airnowapi.org/aq/observation/zipCode/current/"
+FORECAST_CACHE_TTL = 2 * 60 * 60 # seconds
+CURRENT_CACHE_TTL = 30 * 60 # seconds
 TIMEZONE_LOOKUP = {
     "HST": -10,
     "HDT": -9,
@@ -21,6 +36,12 @@ TIMEZONE_LOOKUP = {
     "AST": -4,
     "ADT": -3
 }
+METRIC_RENAME = {"PM2.5": "PM2_5"}
+METRIC_GETTER = operator.attrgetter("CO", "NO2", "O3", "PM2_5", "PM10")
+TIMEZONE_CACHE = {
+    tz: datetime.timezone(datetime.timedelta(hours=offset), tz)
+    for tz, offset in TIMEZONE_LOOKUP.items()
+}
 
 
 class NoDataError(Exception):
@@ -40,7 +61,10 @@ class Severity(enum.Enum):
     HAZARDOUS = 6
 
 
-@dataclass
+SEVERITY_LOOKUP = {severity.value: severity for severity in Severity}
+
+
+@dataclass(slots=True)
 class AQI:
     """
     AQI data for a metric
@@ -67,7 +91,7 @@ class AQI:
     is_action_day: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Forecast:
     """
     Forecast information may include one or more metrics for
@@ -118,10 +142,10 @@ class Forecast:
 
     def __iter__(self) -> Iterable[Optional[AQI]]:
         """Iterate over metrics"""
-        return iter([self.CO, self.NO2, self.O3, self.PM2_5, self.PM10 ])
+        return iter(METRIC_GETTER(self))
 
 
-@dataclass
+@dataclass(slots=True)
 class Observation:
     """
     Observed air quality metrics and associated meta-data for a reporting
@@ -167,6 +191,10 @@ class Observation:
     O3: Optional[AQI] = None
     PM2_5: Optional[AQI] = None
     PM10: Optional[AQI] = None
+    datetime_observed: Optional[datetime.datetime] = field(
+        init=False,
+        default=None
+    )
 
     def __post_init__(self):
         """Build the datetime_observed attribute"""
@@ -181,29 +209,46 @@ class Observation:
 
     def __iter__(self) -> Iterable[Optional[AQI]]:
         """Iterate over metrics"""
-        return iter([self.CO, self.NO2, self.O3, self.PM2_5, self.PM10 ])
+        return iter(METRIC_GETTER(self))
 
 
 class AirNow:
     """
     Connection object to AirNow REST API
 
-    Parameters:
-        token (str): AirNow API authentication token.
-
     Parameters:
         token (str): AirNow API authentication token.
         client (Any): Any HTTP client implementing an interface
             the is requests compatible. Ex: requests, httpx.
+        async_client (Optional[Any]): An async HTTP client with the same
+            interface whose get method is awaitable. Ex: httpx.AsyncClient.
+            Required for aget_forecast and aget_current.
+        cache (Optional[Any]): A response cache from lib.cache. When
+            provided, fresh entries skip the HTTP request and stale entries
+            are returned if the AirNow API returns a 5xx or the request
+            raises one of fallback_errors.
+        fallback_errors (Tuple[Type[BaseException], ...]): Client exceptions
+            that indicate AirNow is unreachable, such as timeouts and
+            connection errors. Ex: (httpx.TransportError,)
     """
-    def __init__(self, token: str, client: Any):
+    def __init__(
+        self,
+        token: str,
+        client: Any,
+        async_client: Any = None,
+        cache: Any = None,
+        fallback_errors: Tuple[Type[BaseException], ...] = ()
+    ):
         self.client = client
+        self.async_client = async_client
+        self.cache = cache
+        self.fallback_errors = fallback_errors
         self.token = token
 
     def get_forecast(
         self,
         zip_code: str,
-        date: datetime.date = datetime.date.today(),
+        date: Optional[datetime.date] = None,
         distance: int = 25,
     ) -> List[Forecast]:
         """
@@ -211,8 +256,8 @@ class AirNow:
 
         Parameters:
             zip_code (str): The U.S. postal zip code
-            date (datetime.date): Defaults to current local date. The date
-                of the day you want the forecast for.
+            date (Optional[datetime.date]): Defaults to current local date.
+                The date of the day you want the forecast for.
             distance (int): The distance in miles from the zip code to
                 look for data
 
@@ -222,16 +267,24 @@ class AirNow:
         Raises:
             NoDataError: If an empty list is returned from the AirNow API.
         """
-        formatted_date = date.strftime("%Y-%m-%d")
-        url = (f"{FORECAST_BASE_URL}zipCode={zip_code}&date={formatted_date}"
-                + f"&distance={distance}&API_KEY={self.token}")
-        response = self.client.get(url)
-        response.raise_for_status()
-        data = response.json()
-        if not data:
-            raise NoDataError(f"No data for zip code {zip_code}.")
+        params, key = self._forecast_request(zip_code, date, distance)
+        data = self._fetch(
+            FORECAST_BASE_URL, params, key, FORECAST_CACHE_TTL, zip_code
+        )
         return AirNow._build_forecasts(data)
 
+    async def aget_forecast(
+        self,
+        zip_code: str,
+        date: Optional[datetime.date] = None,
+        distance: int = 25,
+    ) -> List[Forecast]:
+        """Async variant of get_forecast using the async_client"""
+        params, key = self._forecast_request(zip_code, date, distance)
+        data = await self._afetch(
+            FORECAST_BASE_URL, params, key, FORECAST_CACHE_TTL, zip_code
+        )
+        return AirNow._build_forecasts(data)
 
     def get_current(
         self,
@@ -252,25 +305,187 @@ class AirNow:
         Raises:
             NoDataError: If an empty list is returned from the AirNow API.
         """
-        url = (f"{OBSERVATION_BASE_URL}zipCode={zip_code}&distance={distance}"
-                + f"&API_KEY={self.token}")
-        response = self.client.get(url)
+        params, key = self._observation_request(zip_code, distance)
+        data = self._fetch(
+            OBSERVATION_BASE_URL, params, key, CURRENT_CACHE_TTL, zip_code
+        )
+        return AirNow._build_observation(data)
+
+    async def aget_current(
+        self,
+        zip_code: str,
+        distance: int = 25
+    ) -> Observation:
+        """Async variant of get_current using the async_client"""
+        params, key = self._observation_request(zip_code, distance)
+        data = await self._afetch(
+            OBSERVATION_BASE_URL, params, key, CURRENT_CACHE_TTL, zip_code
+        )
+        return AirNow._build_observation(data)
+
+    def _forecast_request(
+        self,
+        zip_code: str,
+        date: Optional[datetime.date],
+        distance: int
+    ) -> Tuple[Dict[str,Any], str]:
+        """Builds the forecast request query parameters and cache key"""
+        if date is None:
+            date = datetime.date.today()
+        formatted_date = date.strftime("%Y-%m-%d")
+        params = {
+            "format": "application/json",
+            "zipCode": zip_code,
+            "date": formatted_date,
+            "distance": distance,
+            "API_KEY": self.token,
+        }
+        return params, f"forecast:{zip_code}:{formatted_date}:{distance}"
+
+    def _observation_request(
+        self,
+        zip_code: str,
+        distance: int
+    ) -> Tuple[Dict[str,Any], str]:
+        """Builds the current observation query parameters and cache key"""
+        params = {
+            "format": "application/json",
+            "zipCode": zip_code,
+            "distance": distance,
+            "API_KEY": self.token,
+        }
+        return params, f"current:{zip_code}:{distance}"
+
+    def _fetch(
+        self,
+        url: str,
+        params: Dict[str,Any],
+        key: str,
+        ttl: float,
+        zip_code: str
+    ) -> List[Dict[str,Any]]:
+        """Returns JSON data for url from the cache or the AirNow API"""
+        entry, cached = self._cached(key, ttl, zip_code)
+        if entry is not None and not entry.is_stale:
+            return cached
+        try:
+            response = self.client.get(url, params=params)
+        except self.fallback_errors as error:
+            if cached is None:
+                raise
+            return AirNow._fallback(cached, key, repr(error))
+        data, is_new = AirNow._read_response(response, key, zip_code, cached)
+        if is_new:
+            self._cache_set(key, response.content, ttl)
+        return data
+
+    async def _afetch(
+        self,
+        url: str,
+        params: Dict[str,Any],
+        key: str,
+        ttl: float,
+        zip_code: str
+    ) -> List[Dict[str,Any]]:
+        """Async variant of _fetch using the async_client"""
+        if self.async_client is None:
+            raise ValueError(
+                "aget_forecast and aget_current require an async_client"
+            )
+        # Cache backends are synchronous, so keep them off the event loop
+        entry, cached = await asyncio.to_thread(
+            self._cached, key, ttl, zip_code
+        )
+        if entry is not None and not entry.is_stale:
+            return cached
+        try:
+            response = await self.async_client.get(url, params=params)
+        except self.fallback_errors as error:
+            if cached is None:
+                raise
+            return AirNow._fallback(cached, key, repr(error))
+        data, is_new = AirNow._read_response(response, key, zip_code, cached)
+        if is_new:
+            await asyncio.to_thread(
+                self._cache_set, key, response.content, ttl
+            )
+        return data
+
+    def _cached(
+        self,
+        key: str,
+        ttl: float,
+        zip_code: str
+    ) -> Tuple[Optional[CacheEntry], Optional[List[Dict[str,Any]]]]:
+        """
+        Looks up key, returning the entry and its parsed data. Cache
+        failures and unreadable entries are logged and treated as a miss.
+        """
+        if self.cache is None:
+            return None, None
+        try:
+            entry = self.cache.get(key, ttl)
+            if entry is None:
+                return None, None
+            return entry, AirNow._parse(entry.data, zip_code)
+        except Exception:
+            logger.exception("AirNow cache lookup for %s failed", key)
+            return None, None
+
+    def _cache_set(self, key: str, data: bytes, ttl: float):
+        """Stores a response body, logging rather than raising on failure"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(key, data, ttl)
+        except Exception:
+            logger.exception("AirNow cache store for %s failed", key)
+
+    @staticmethod
+    def _read_response(
+        response: Any,
+        key: str,
+        zip_code: str,
+        cached: Optional[List[Dict[str,Any]]]
+    ) -> Tuple[List[Dict[str,Any]], bool]:
+        """
+        Checks an HTTP response and returns its JSON data, and whether it
+        came from the response rather than the stale cache.
+        """
+        if response.status_code >= 500 and cached is not None:
+            reason = f"HTTP {response.status_code}"
+            return AirNow._fallback(cached, key, reason), False
         response.raise_for_status()
-        data = response.json()
+        return AirNow._parse(response.content, zip_code), True
+
+    @staticmethod
+    def _fallback(
+        cached: List[Dict[str,Any]],
+        key: str,
+        reason: str
+    ) -> List[Dict[str,Any]]:
+        """Returns stale cached data after a failed request"""
+        logger.warning(
+            "AirNow request for %s failed (%s), serving stale cached data",
+            key,
+            reason
+        )
+        return cached
+
+    @staticmethod
+    def _parse(raw: bytes, zip_code: str) -> List[Dict[str,Any]]:
+        """Parses a raw JSON response body"""
+        data = json_loads(raw)
         if not data:
             raise NoDataError(f"No data for zip code {zip_code}.")
-        return AirNow._build_observation(data)
+        return data
 
     @staticmethod
     def _build_forecasts(data: List[Dict[str,Any]]) -> List[Forecast]:
         """Builds a Forecast object from HTTP response data"""
-        dates = {}
+        dates = defaultdict(list)
         for dp in data:
-            dp_date = dp["DateForecast"]
-            if dp_date in dates:
-                dates[dp_date].append(dp)
-            else:
-                dates[dp_date] = [dp]
+            dates[dp["DateForecast"]].append(dp)
 
         forecasts = []
         for dp_list in dates.values():
@@ -284,18 +499,13 @@ class AirNow:
             ]
             kwargs = {}
             for dp in dp_list:
-                aqi = AQI(
-                    dp["ParameterName"],
+                name = dp["ParameterName"]
+                kwargs[METRIC_RENAME.get(name, name)] = AQI(
+                    name,
                     dp["AQI"],
-                    Severity(dp["Category"]["Number"]), dp["ActionDay"]
+                    SEVERITY_LOOKUP[dp["Category"]["Number"]], dp["ActionDay"]
                 )
 
-                if dp["ParameterName"] == "PM2.5":
-                    metric_name = "PM2_5"
-                else:
-                    metric_name = dp["ParameterName"]
-                kwargs[metric_name] = aqi
-
             forecasts.append(Forecast(*args, **kwargs))
 
         return forecasts
@@ -314,26 +524,16 @@ class AirNow:
         ]
         kwargs = {}
         for dp in data:
-            aqi = AQI(
-                dp["ParameterName"],
+            name = dp["ParameterName"]
+            kwargs[METRIC_RENAME.get(name, name)] = AQI(
+                name,
                 dp["AQI"],
-                Severity(dp["Category"]["Number"])
+                SEVERITY_LOOKUP[dp["Category"]["Number"]]
             )
 
-            if dp["ParameterName"] == "PM2.5":
-                metric_name = "PM2_5"
-            else:
-                metric_name = dp["ParameterName"]
-            kwargs[metric_name] = aqi
-
         return Observation(*args, **kwargs)
 
 
 def get_timezone(tz: str) -> datetime.timezone:
     """Returns a timezone object for the provided tz"""
-    offset = TIMEZONE_LOOKUP[tz]
-    if offset < 0:
-        delta = -datetime.timedelta(hours=abs(offset))
-    else:
-        delta = datetime.timedelta(hours=offset)
-    return datetime.timezone(delta, tz)
+    return TIMEZONE_CACHE[tz]
@@ -0,0 +1,213 @@
+import os
+import time
+import tempfile
+import urllib.parse
+from typing import Optional, Any
+from dataclasses import dataclass
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "aqi-bot")
+DEFAULT_RETENTION = 24 * 60 * 60 # seconds
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached HTTP response body
+
+    Attributes:
+        data (bytes): The raw response body.
+        is_stale (bool): Indicates the entry is older than its TTL. Stale
+            entries are only used when the upstream API is unavailable.
+    """
+    data: bytes
+    is_stale: bool
+
+
+class FileCache:
+    """
+    Cache backed by files on local disk. Freshness is determined by the
+    file's modification time. Suited to AWS Lambda where /tmp survives
+    between warm invocations.
+
+    Parameters:
+        directory (str): Directory to store cache files in. Defaults to
+            an aqi-bot folder in the system temp directory.
+        retention (float): Seconds to keep entries after they were
+            written. Defaults to one day.
+
+    Attributes:
+        directory (str): Directory to store cache files in.
+        retention (float): Seconds to keep entries after they were
+            written.
+    """
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        retention: float = DEFAULT_RETENTION
+    ):
+        self.directory = directory
+        self.retention = retention
+
+    def get(self, key: str, ttl: float) -> Optional[CacheEntry]:
+        """
+        Get the entry stored under key.
+
+        Parameters:
+            key (str): The cache key.
+            ttl (float): Seconds an entry is considered fresh for.
+
+        Returns:
+            Optional[CacheEntry]: The cached entry or None if missing or
+                older than retention.
+        """
+        path = self._path(key, ".json")
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > max(ttl, self.retention):
+                return None
+            with open(path, "rb") as cache_file:
+                data = cache_file.read()
+        except OSError:
+            return None
+        return CacheEntry(data, age > ttl)
+
+    def set(self, key: str, data: bytes, ttl: float):
+        """
+        Store data under key.
+
+        Parameters:
+            key (str): The cache key.
+            data (bytes): The raw response body.
+            ttl (float): Seconds the entry is considered fresh for. Unused,
+                freshness is computed from the file mtime on read.
+        """
+        self._write(self._path(key, ".json"), data)
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Get data stored under key with set_raw. Raw entries never expire.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            Optional[bytes]: The stored data or None if missing.
+        """
+        try:
+            with open(self._path(key, ".bin"), "rb") as cache_file:
+                return cache_file.read()
+        except FileNotFoundError:
+            return None
+
+    def set_raw(self, key: str, data: bytes):
+        """
+        Store data under key without an expiry.
+
+        Parameters:
+            key (str): The cache key.
+            data (bytes): The data to store.
+        """
+        self._write(self._path(key, ".bin"), data)
+
+    def _write(self, path: str, data: bytes):
+        """Writes data to path"""
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str, extension: str) -> str:
+        """Returns the file path for key"""
+        return os.path.join(
+            self.directory,
+            urllib.parse.quote(key, safe="") + extension
+        )
+
+
+class RedisCache:
+    """
+    Cache backed by Redis for long-running or multi-host deployments.
+    Entries are stored as a hash of the raw data and a stale_at
+    timestamp, and are kept past their TTL for the stale fallback.
+
+    Parameters:
+        client (Any): A redis.Redis compatible client.
+        retention (float): Seconds to keep entries after they were
+            written. Defaults to one day.
+        prefix (str): Namespace prepended to every key so the cache can
+            share a Redis database. Defaults to "aqi-bot:".
+
+    Attributes:
+        client (Any): A redis.Redis compatible client.
+        retention (float): Seconds to keep entries after they were
+            written.
+        prefix (str): Namespace prepended to every key.
+    """
+    def __init__(
+        self,
+        client: Any,
+        retention: float = DEFAULT_RETENTION,
+        prefix: str = "aqi-bot:"
+    ):
+        self.client = client
+        self.retention = retention
+        self.prefix = prefix
+
+    def get(self, key: str, ttl: float) -> Optional[CacheEntry]:
+        """
+        Get the entry stored under key.
+
+        Parameters:
+            key (str): The cache key.
+            ttl (float): Seconds an entry is considered fresh for. Unused,
+                freshness is read from the stored stale_at field.
+
+        Returns:
+            Optional[CacheEntry]: The cached entry or None if missing.
+        """
+        entry = self.client.hgetall(self.prefix + key)
+        if not entry:
+            return None
+        stale_at = float(entry[b"stale_at"])
+        return CacheEntry(entry[b"data"], time.time() > stale_at)
+
+    def set(self, key: str, data: bytes, ttl: float):
+        """
+        Store data under key.
+
+        Parameters:
+            key (str): The cache key.
+            data (bytes): The raw response body.
+            ttl (float): Seconds the entry is considered fresh for.
+        """
+        pipeline = self.client.pipeline()
+        pipeline.hset(self.prefix + key, mapping={
+            "data": data,
+            "stale_at": time.time() + ttl
+        })
+        pipeline.expire(self.prefix + key, int(max(ttl, self.retention)))
+        pipeline.execute()
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Get data stored under key with set_raw. Raw entries never expire.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            Optional[bytes]: The stored data or None if missing.
+        """
+        return self.client.get(self.prefix + key)
+
+    def set_raw(self, key: str, data: bytes):
+        """
+        Store data under key without an expiry.
+
+        Parameters:
+            key (str): The cache key.
+            data (bytes): The data to store.
+        """
+        self.client.set(self.prefix + key, data)
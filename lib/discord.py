@@ -0,0 +1,150 @@
+import time
+from collections import deque
+from typing import Any, Dict
+
+MAX_EMBEDS = 10 # Discord's limit of embeds per webhook message
+
+
+class RateLimitError(Exception):
+    """Exception indicating Discord asked for a longer wait than allowed"""
+    pass
+
+
+class DiscordWebhookSender:
+    """
+    Queued sender for a Discord webhook that honors Discord's rate limits.
+    Messages made up only of embeds are batched into as few webhook
+    posts as possible.
+
+    Parameters:
+        url (str): The Discord webhook URL.
+        client (Any): Any HTTP client implementing an interface
+            the is requests compatible. Ex: requests, httpx.
+        max_retries (int): Times to retry a message after a 429 response.
+        max_wait (float): Most seconds to sleep for a rate limit before
+            raising RateLimitError instead.
+
+    Attributes:
+        url (str): The Discord webhook URL.
+        client (Any): The HTTP client used to post messages.
+        max_retries (int): Times to retry a message after a 429 response.
+        max_wait (float): Most seconds to sleep for a rate limit.
+        pending (deque): Message payloads waiting to be sent.
+        next_allowed_at (float): time.monotonic value before which no
+            request should be made.
+    """
+    def __init__(
+        self,
+        url: str,
+        client: Any,
+        max_retries: int = 3,
+        max_wait: float = 30.0
+    ):
+        self.url = url
+        self.client = client
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.pending = deque()
+        self.next_allowed_at = 0.0
+
+    def queue(self, payload: Dict[str,Any]):
+        """
+        Add a message payload to be sent on the next flush.
+
+        Parameters:
+            payload (Dict[str,Any]): The webhook JSON payload.
+                Ex: {"content": "Hello"}
+        """
+        self.pending.append(payload)
+
+    def send(self, payload: Dict[str,Any]):
+        """
+        Queue a message payload and send everything pending.
+
+        Parameters:
+            payload (Dict[str,Any]): The webhook JSON payload.
+
+        Raises:
+            httpx.HTTPStatusError: If Discord rejects a message or keeps
+                rate limiting past max_retries.
+            RateLimitError: If a rate limit wait would exceed max_wait.
+        """
+        self.queue(payload)
+        self.flush()
+
+    def flush(self):
+        """
+        Send all pending messages, waiting out rate limits as needed.
+
+        Raises:
+            httpx.HTTPStatusError: If Discord rejects a message or keeps
+                rate limiting past max_retries.
+            RateLimitError: If a rate limit wait would exceed max_wait.
+        """
+        while self.pending:
+            batch = self._next_batch()
+            try:
+                self._post(batch)
+            except RateLimitError:
+                # Keep the message so a later flush can still deliver it
+                self.pending.appendleft(batch)
+                raise
+
+    def _next_batch(self) -> Dict[str,Any]:
+        """Pops the next payload, merging consecutive embed-only messages"""
+        payload = self.pending.popleft()
+        if not is_embeds_only(payload):
+            return payload
+
+        embeds = list(payload["embeds"])
+        while (self.pending and len(embeds) < MAX_EMBEDS
+                and is_embeds_only(self.pending[0])):
+            embeds.extend(self.pending.popleft()["embeds"])
+        if len(embeds) > MAX_EMBEDS:
+            self.pending.appendleft({"embeds": embeds[MAX_EMBEDS:]})
+        return {"embeds": embeds[:MAX_EMBEDS]}
+
+    def _post(self, payload: Dict[str,Any]) -> Any:
+        """Posts a payload, retrying after 429 responses"""
+        for attempt in range(self.max_retries + 1):
+            delay = self.next_allowed_at - time.monotonic()
+            if delay > self.max_wait:
+                raise RateLimitError(
+                    f"Discord rate limit wait of {delay:.1f}s exceeds "
+                    + f"max_wait of {self.max_wait}s"
+                )
+            if delay > 0:
+                time.sleep(delay)
+
+            response = self.client.post(self.url, json=payload)
+            self._update_limits(response)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+
+        response.raise_for_status()
+        return response
+
+    def _update_limits(self, response: Any):
+        """Updates next_allowed_at from Discord's rate limit response"""
+        now = time.monotonic()
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if response.status_code == 429:
+            # The headers are always in seconds, but the body's retry_after
+            # is in milliseconds on older API versions, so it is a last resort
+            retry_after = response.headers.get("Retry-After") or reset_after
+            if retry_after is None:
+                try:
+                    retry_after = response.json()["retry_after"]
+                except (ValueError, KeyError, TypeError):
+                    pass
+            self.next_allowed_at = now + float(retry_after or 1)
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining == "0" and reset_after is not None:
+            self.next_allowed_at = now + float(reset_after)
+
+
+def is_embeds_only(payload: Dict[str,Any]) -> bool:
+    """Returns True if a payload only contains embeds"""
+    return list(payload) == ["embeds"]